@@ -0,0 +1,56 @@
+# Define available interests
+INTERESTS = (
+    "Strategy", "Operations", "Entrepreneurship", "Leadership", "Management",
+    "Marketing", "Sales", "Investing", "Personal Finance", "Corporate Finance",
+    "Financial Planning", "Venture Capital", "Economics", "Artificial Intelligence",
+    "Blockchain", "Cybersecurity", "Software Development", "Data Science",
+    "Cloud Computing", "Remote Work", "Career Development", "Workplace Culture",
+    "Job Hunting", "Networking", "Freelancing", "Mental Health", "Physical Fitness",
+    "Nutrition", "Mindfulness", "Work-Life Balance", "Sleep", "Productivity",
+    "Time Management", "Goal Setting", "Habits", "Self-Discipline", "Motivation",
+    "Lifelong Learning", "Online Courses", "Reading", "Writing", "Public Speaking",
+    "Critical Thinking", "Design", "Storytelling", "Content Creation", "Innovation",
+    "Art", "Media", "Diversity & Inclusion", "Social Impact", "Ethics",
+    "Global Trends", "Politics", "Sustainability", "Space Exploration",
+    "Climate Change", "Biotech", "Futurism", "Quantum Computing",
+    "Emerging Technologies"
+)
+
+# Lowercase forms, computed once at import
+INTERESTS_LOWER = [interest.lower() for interest in INTERESTS]
+
+# Static instructions and the numbered interest list, sent once as the system message
+# so the per-profile prompt only carries the profile itself
+INTERESTS_NUMBERED = '\n'.join(f"{i}: {interest}" for i, interest in enumerate(INTERESTS))
+SYSTEM_PROMPT = (
+    "You are a professional career analyst. Your task is to analyze LinkedIn profiles and identify relevant professional interests and expertise areas.\n"
+    "For each profile, select at least 5 of the most relevant interests from the numbered list below, referring to them by number. "
+    "Always return a valid JSON object.\n\n"
+    + INTERESTS_NUMBERED
+)
+
+# Prompt templates for the user message
+PROFILE_PROMPT_TEMPLATE = (
+    "Person's information:\n"
+    "Name: {first_name} {last_name}\n"
+    "Company: {company}\n"
+    "Position: {position}\n\n"
+    "Profile content:\n"
+    "{text}\n\n"
+    'Return the numbers of the most relevant interests. Example response format: {{"ids": [3, 4, 0, 46, 20]}}'
+)
+
+BATCH_PROFILE_TEMPLATE = (
+    "### Profile {index}\n"
+    "Name: {first_name} {last_name}\n"
+    "Company: {company}\n"
+    "Position: {position}\n\n"
+    "Profile content:\n"
+    "{text}\n\n"
+)
+
+BATCH_PROMPT_TEMPLATE = (
+    "{profiles}"
+    "Return the numbers of the most relevant interests for each profile, with one result per profile and the profile number as the index.\n"
+    'Example response format: {{"results": [{{"index": 1, "ids": [3, 4, 0, 46, 20]}}]}}'
+)
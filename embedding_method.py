@@ -0,0 +1,73 @@
+import asyncio
+import numpy as np
+from numba import njit, prange
+from typing import TYPE_CHECKING, List, Tuple
+from openai import AsyncOpenAI
+from constants import INTERESTS
+
+if TYPE_CHECKING:
+    from serpapi_method import RateLimiter
+
+# Embedding model used for both interest labels and profiles
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Number of interests returned per profile
+TOP_K = 10
+
+# Quantized interest label embeddings and their row scales, computed once per run
+_label_embeddings = None
+_label_lock = None
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Scale embeddings to unit length along the last axis.
+    """
+    return embeddings / np.linalg.norm(embeddings, axis=-1, keepdims=True)
+
+def quantize(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize normalized embeddings to int8, with one float32 scale per row.
+    """
+    scales = (np.max(np.abs(embeddings), axis=-1) / 127).astype(np.float32)
+    quantized = np.round(embeddings / scales[..., None]).astype(np.int8)
+    return np.ascontiguousarray(quantized), scales
+
+async def get_label_embeddings(client: AsyncOpenAI, limiter: 'RateLimiter') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Embed the interest labels on first use and return them normalized and quantized.
+    The request is throttled by limiter like any other embeddings call.
+    """
+    global _label_embeddings, _label_lock
+    if _label_lock is None:
+        # Created lazily so it binds to the running event loop
+        _label_lock = asyncio.Lock()
+    async with _label_lock:
+        if _label_embeddings is None:
+            await limiter.acquire(estimated_tokens=sum(len(interest) for interest in INTERESTS) // 4)
+            response = await client.embeddings.create(model=EMBEDDING_MODEL, input=list(INTERESTS))
+            _label_embeddings = quantize(normalize(np.array([item.embedding for item in response.data], dtype=np.float32)))
+    return _label_embeddings
+
+@njit(parallel=True, cache=True)
+def cosine_scores(label_q: np.ndarray, label_scales: np.ndarray, profile_q: np.ndarray, profile_scale: float) -> np.ndarray:
+    """
+    Score each quantized label embedding against the quantized profile embedding.
+    Products are accumulated as integers and rescaled once per label.
+    """
+    scores = np.empty(label_q.shape[0], dtype=np.float32)
+    for i in prange(label_q.shape[0]):
+        total = 0
+        for j in range(label_q.shape[1]):
+            total += np.int32(label_q[i, j]) * np.int32(profile_q[j])
+        scores[i] = total * label_scales[i] * profile_scale
+    return scores
+
+def rank_interests(labels: Tuple[np.ndarray, np.ndarray], profile_embedding: np.ndarray, k: int = TOP_K) -> List[str]:
+    """
+    Return the k interests whose labels are most similar to the profile, best first.
+    """
+    label_q, label_scales = labels
+    profile_q, profile_scale = quantize(normalize(profile_embedding))
+    scores = cosine_scores(label_q, label_scales, profile_q, profile_scale[()])
+    top = np.argpartition(-scores, k)[:k]
+    return [INTERESTS[i] for i in top[np.argsort(-scores[top])]]
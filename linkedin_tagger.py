@@ -1,137 +1,150 @@
 import os
+import argparse
+import asyncio
+import atexit
+import csv
 import pandas as pd
-from openai import OpenAI
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 import logging
+import logging.handlers
+import queue
 from dotenv import load_dotenv
-import json
-from typing import List, Dict
-from serpapi_method import process_profiles as process_profiles_serpapi
+from itertools import chain, islice
+from typing import Iterator, List, Optional, Union
+from serpapi_method import PROFILE_COLUMNS, TAGGING_METHOD, process_profiles_batch_api, process_profiles as process_profiles_serpapi
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('linkedin_tagger.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging. Records are queued and written to the file and console by a
+# background listener thread, keeping handler I/O off the event loop
+log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+file_handler = logging.FileHandler('linkedin_tagger.log')
+file_handler.setFormatter(log_formatter)
+stream_handler = logging.StreamHandler()
+stream_handler.setFormatter(log_formatter)
 
-# Load environment variables
-load_dotenv()
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# The queue handler only merges the arguments into the message; the listener's
+# handlers apply the full format
+logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[logging.handlers.QueueHandler(log_queue)])
 
-# Define available interests
-INTERESTS = [
-    "Strategy", "Operations", "Entrepreneurship", "Leadership", "Management",
-    "Marketing", "Sales", "Investing", "Personal Finance", "Corporate Finance",
-    "Financial Planning", "Venture Capital", "Economics", "Artificial Intelligence",
-    "Blockchain", "Cybersecurity", "Software Development", "Data Science",
-    "Cloud Computing", "Remote Work", "Career Development", "Workplace Culture",
-    "Job Hunting", "Networking", "Freelancing", "Mental Health", "Physical Fitness",
-    "Nutrition", "Mindfulness", "Work-Life Balance", "Sleep", "Productivity",
-    "Time Management", "Goal Setting", "Habits", "Self-Discipline", "Motivation",
-    "Lifelong Learning", "Online Courses", "Reading", "Writing", "Public Speaking",
-    "Critical Thinking", "Design", "Storytelling", "Content Creation", "Innovation",
-    "Art", "Media", "Diversity & Inclusion", "Social Impact", "Ethics",
-    "Global Trends", "Politics", "Sustainability", "Space Exploration",
-    "Climate Change", "Biotech", "Futurism", "Quantum Computing",
-    "Emerging Technologies"
-]
+# httpx logs every request URL at INFO, and SerpAPI URLs carry the API key
+logging.getLogger('httpx').setLevel(logging.WARNING)
 
-def get_interests_from_profile(profile_text: str, person_info: Dict) -> List[str]:
-    """
-    Use OpenAI's API to analyze the profile and return relevant interests.
-    """
-    try:
-        # Truncate profile text to reduce token count
-        max_tokens = 2000
-        truncated_text = profile_text[:max_tokens]
-        
-        prompt = f"""
-        Based on the following LinkedIn profile information, select at least 5 most relevant interests from the provided list.
-        Only select from these interests: {', '.join(INTERESTS)}
-        
-        Person's information:
-        Name: {person_info['first_name']} {person_info['last_name']}
-        Company: {person_info['company']}
-        Position: {person_info['position']}
-        
-        Profile content:
-        {truncated_text}
-        
-        Return the interests as a JSON array of strings, selecting the most relevant interests based on the profile information.
-        """
-
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "You are a professional career analyst. Your task is to analyze LinkedIn profiles and identify relevant professional interests and expertise areas."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=500
-        )
-
-        # Extract and parse the interests from the response
-        interests_text = response.choices[0].message.content
-        interests = json.loads(interests_text)
-        return interests[:10]  # Limit to 10 interests maximum
+# Load environment variables
+load_dotenv()
 
-    except Exception as e:
-        logging.error(f"Error getting interests for {person_info['first_name']} {person_info['last_name']}: {str(e)}")
-        return []
+# Number of rows read and processed at a time
+CHUNK_SIZE = 256
 
 def validate_csv_structure(df: pd.DataFrame) -> bool:
     """
     Validate that the CSV has the required columns for processing.
     """
-    required_columns = ['First Name', 'Last Name', 'Company', 'Position']
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    required_columns = ['First Name', 'Last Name', 'Company', 'Position', 'URL']
+    missing_columns = sorted(set(required_columns) - set(df.columns))
     
     if missing_columns:
-        logging.error(f"CSV is missing required columns: {', '.join(missing_columns)}")
+        logging.error("CSV is missing required columns: %s", ', '.join(missing_columns))
         return False
     return True
 
-def read_linkedin_csv(file_path: str) -> pd.DataFrame:
+def _iter_chunks(reader: pa_csv.CSVStreamingReader, chunksize: int, nrows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Convert the record batches from Arrow's streaming CSV reader into DataFrames of
+    at most chunksize rows, stopping after nrows rows.
+    """
+    with reader:
+        for batch in reader:
+            if nrows is not None:
+                batch = batch.slice(0, nrows)
+                nrows -= batch.num_rows
+            for start in range(0, batch.num_rows, chunksize):
+                yield batch.slice(start, chunksize).to_pandas()
+            if nrows == 0:
+                break
+
+def read_linkedin_csv(
+    file_path: str,
+    usecols: Optional[List[str]] = None,
+    chunksize: Optional[int] = None,
+    nrows: Optional[int] = None
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
     """
     Read LinkedIn CSV file, automatically handling notes if present.
+    Only the columns in usecols (by default the ones used for tagging) are loaded.
+    With chunksize, returns an iterator of DataFrames instead of a single one.
     """
     try:
-        # First, try reading without skipping rows
-        df = pd.read_csv(file_path)
-        
-        # Check if the first few rows might be notes
+        # Peek at the first rows once to decide how many note rows to skip
         # Notes typically have fewer columns or contain text like "Notes" or "Export"
-        first_row = df.iloc[0]
-        if len(first_row) < 4 or any('note' in str(val).lower() for val in first_row):
-            # Try reading again, skipping the first row
-            df = pd.read_csv(file_path, skiprows=1)
-            
-            # Check if the second row might also be notes
-            second_row = df.iloc[0]
-            if len(second_row) < 4 or any('note' in str(val).lower() for val in second_row):
-                # Skip both rows
-                df = pd.read_csv(file_path, skiprows=2)
+        with open(file_path, newline='', encoding='utf-8-sig', errors='replace') as f:
+            preview = list(islice(csv.reader(f), 5))
+        
+        skip = 0
+        for row in preview[:2]:
+            if sum(1 for val in row if val.strip()) < 4 or any('note' in val.lower() for val in row):
+                skip += 1
+            else:
+                break
         
-        return df
+        # The header is the first non-blank row after the notes
+        while skip < len(preview) and not any(val.strip() for val in preview[skip]):
+            skip += 1
+        header = preview[skip] if skip < len(preview) else None
+        wanted = set(usecols or PROFILE_COLUMNS)
+        columns = [col for col in header if col in wanted] if header else None
+        
+        # Arrow's multi-threaded parser, restricted to the columns we need. It ignores
+        # skiprows when reading a header, so the notes are skipped by pointing header at
+        # the right row instead
+        if chunksize is None:
+            df = pd.read_csv(file_path, header=skip, engine='pyarrow', usecols=columns or None)
+            return df if nrows is None else df.head(nrows)
+        
+        # pandas' pyarrow engine can't stream, so chunked reads use Arrow's streaming
+        # reader directly. Columns are read as strings so a column that is empty in
+        # the first block can't fix its type for the rest of the file, and empty
+        # cells stay '' rather than becoming None in prompts
+        reader = pa_csv.open_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(skip_rows=skip),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns or [],
+                column_types=dict.fromkeys(columns or [], pa.string())
+            )
+        )
+        return _iter_chunks(reader, chunksize, nrows)
     
     except Exception as e:
-        logging.error(f"Error reading CSV file: {str(e)}")
+        logging.error("Error reading CSV file: %s", e)
         raise
 
 def main():
     """
     Main function to run the LinkedIn profile interest tagger.
     """
+    parser = argparse.ArgumentParser(description="Tag LinkedIn connections with relevant professional interests.")
+    parser.add_argument('--limit', type=int, help="Only process the first N connections (useful for testing)")
+    parser.add_argument('--batch', action='store_true', help="Tag profiles with OpenAI's Batch API: half the cost, results within 24 hours")
+    args = parser.parse_args()
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit must be at least 1")
+    
     if not os.getenv('OPENAI_API_KEY'):
         raise ValueError("OpenAI API key not found. Please set it in your .env file.")
     
     if not os.getenv('SERPAPI_API_KEY'):
         raise ValueError("SerpAPI key not found. Please set it in your .env file.")
+    
+    if TAGGING_METHOD not in ('chat', 'embedding'):
+        raise ValueError(f"Unknown TAGGING_METHOD: {TAGGING_METHOD}. Use 'chat' or 'embedding'.")
+    
+    if args.batch and TAGGING_METHOD != 'chat':
+        raise ValueError("--batch is only supported with TAGGING_METHOD=chat.")
 
     # Get input file from user and strip any quotes
     input_file = input("Enter the path to your LinkedIn connections CSV file: ").strip().strip("'\"")
@@ -140,19 +153,24 @@ def main():
     
     output_file = 'linkedin_connections_with_interests.csv'
     
-    # Read and validate the CSV file
-    df = read_linkedin_csv(input_file)
-    if not validate_csv_structure(df):
-        raise ValueError("Invalid CSV structure. Please ensure your CSV contains the required columns: First Name, Last Name, Company, Position")
+    # Read the CSV file in chunks and validate the first one
+    chunks = read_linkedin_csv(input_file, chunksize=CHUNK_SIZE, nrows=args.limit)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        raise ValueError("No connections found in the CSV file.")
+    if not validate_csv_structure(first_chunk):
+        raise ValueError("Invalid CSV structure. Please ensure your CSV contains the required columns: First Name, Last Name, Company, Position, URL")
     
-    # Limit to first 5 connections
-    df = df.head(5)
-    logging.info(f"Processing first 5 profiles using SerpAPI method")
+    if args.limit is not None:
+        logging.info("Processing first %d profiles using SerpAPI method", args.limit)
+    else:
+        logging.info("Processing all profiles using SerpAPI method")
     
-    # Process profiles using SerpAPI
-    process_profiles_serpapi(df, output_file)
+    # Process profiles using SerpAPI, tagging them live or through the Batch API
+    process_profiles = process_profiles_batch_api if args.batch else process_profiles_serpapi
+    asyncio.run(process_profiles(chain([first_chunk], chunks), output_file))
     
-    logging.info(f"Process completed. Results saved to {output_file}")
+    logging.info("Process completed. Results saved to %s", output_file)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
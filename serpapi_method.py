@@ -1,101 +1,389 @@
 import os
-import requests
+import asyncio
+import ahocorasick
+import csv
+import diskcache
+import hashlib
+import httpx
 import logging
+import random
+import re
 import time
+import numpy as np
+import orjson
 import pandas as pd
 import json
-from typing import Dict, List
-from openai import OpenAI
-
-# Define available interests
-INTERESTS = [
-    "Strategy", "Operations", "Entrepreneurship", "Leadership", "Management",
-    "Marketing", "Sales", "Investing", "Personal Finance", "Corporate Finance",
-    "Financial Planning", "Venture Capital", "Economics", "Artificial Intelligence",
-    "Blockchain", "Cybersecurity", "Software Development", "Data Science",
-    "Cloud Computing", "Remote Work", "Career Development", "Workplace Culture",
-    "Job Hunting", "Networking", "Freelancing", "Mental Health", "Physical Fitness",
-    "Nutrition", "Mindfulness", "Work-Life Balance", "Sleep", "Productivity",
-    "Time Management", "Goal Setting", "Habits", "Self-Discipline", "Motivation",
-    "Lifelong Learning", "Online Courses", "Reading", "Writing", "Public Speaking",
-    "Critical Thinking", "Design", "Storytelling", "Content Creation", "Innovation",
-    "Art", "Media", "Diversity & Inclusion", "Social Impact", "Ethics",
-    "Global Trends", "Politics", "Sustainability", "Space Exploration",
-    "Climate Change", "Biotech", "Futurism", "Quantum Computing",
-    "Emerging Technologies"
-]
+from dataclasses import dataclass, field
+from itertools import chain
+from numba import njit
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception, stop_after_attempt, wait_random_exponential
+from embedding_method import EMBEDDING_MODEL, get_label_embeddings, rank_interests
+from constants import BATCH_PROFILE_TEMPLATE, BATCH_PROMPT_TEMPLATE, INTERESTS, INTERESTS_LOWER, PROFILE_PROMPT_TEMPLATE, SYSTEM_PROMPT
+
+# Load environment variables before reading keys and rate limits
+load_dotenv()
+
+# How interests are chosen: "chat" asks the chat model, "embedding" ranks labels by similarity
+TAGGING_METHOD = os.getenv('TAGGING_METHOD', 'chat')
+
+# Chat model used to tag interests
+CHAT_MODEL = "gpt-4o-mini"
+
+# Maximum number of API requests in flight at once
+MAX_CONCURRENCY = 10
+
+# Number of profiles packed into a single OpenAI request
+BATCH_SIZE = 8
+
+# Profile text is limited to this many characters to reduce token count
+MAX_PROFILE_CHARS = 2000
+
+# Sentences this similar (Jaccard over character 5-grams) to one already kept are dropped
+DUPLICATE_THRESHOLD = 0.7
+
+# Persistent cache for API responses so reruns don't pay for the same lookups
+cache = diskcache.Cache('.tagger_cache')
+CACHE_EXPIRE = 86400 * 7  # One week
+
+# Splits search result text into sentences
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Extracts the profile ID from a LinkedIn profile URL
+_PROFILE_RE = re.compile(r'linkedin\.com/in/([^/?#]+)')
+
+# Automaton matching every interest in a single pass over the model's text
+INTERESTS_AUTOMATON = ahocorasick.Automaton()
+for idx, interest_lower in enumerate(INTERESTS_LOWER):
+    INTERESTS_AUTOMATON.add_word(interest_lower, (idx, INTERESTS[idx]))
+INTERESTS_AUTOMATON.make_automaton()
 
 # Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+@dataclass
+class RateLimiter:
+    """
+    Track available request and token capacity, replenished at per-minute rates.
+    """
+    max_rpm: float
+    max_tpm: Optional[float] = None
+    last_update_time: float = field(default_factory=time.monotonic)
+    request_capacity: float = field(init=False)
+    token_capacity: float = field(init=False)
+
+    def __post_init__(self):
+        self.request_capacity = self.max_rpm
+        self.token_capacity = self.max_tpm or 0
+
+    def _replenish(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.last_update_time
+        self.request_capacity = min(self.max_rpm, self.request_capacity + elapsed * self.max_rpm / 60)
+        if self.max_tpm is not None:
+            self.token_capacity = min(self.max_tpm, self.token_capacity + elapsed * self.max_tpm / 60)
+        self.last_update_time = now
+
+    async def acquire(self, estimated_tokens: int = 0) -> None:
+        """
+        Wait until both request and token capacity are available, then consume them.
+        """
+        if self.max_tpm is not None:
+            # A single request can never need more than the whole bucket
+            estimated_tokens = min(estimated_tokens, self.max_tpm)
+        while True:
+            self._replenish()
+            has_tokens = self.max_tpm is None or self.token_capacity >= estimated_tokens
+            if self.request_capacity >= 1 and has_tokens:
+                self.request_capacity -= 1
+                if self.max_tpm is not None:
+                    self.token_capacity -= estimated_tokens
+                return
+            await asyncio.sleep(0.01)
+
+# Rate limiters for each API (OpenAI limits depend on the account tier)
+serpapi_limiter = RateLimiter(max_rpm=100)
+openai_limiter = RateLimiter(
+    max_rpm=float(os.getenv('OPENAI_MAX_RPM', 500)),
+    max_tpm=float(os.getenv('OPENAI_MAX_TPM', 30000))
+)
+# Embeddings have their own, much higher limits, so they don't share the chat budget
+embedding_limiter = RateLimiter(
+    max_rpm=float(os.getenv('OPENAI_EMBEDDING_MAX_RPM', 3000)),
+    max_tpm=float(os.getenv('OPENAI_EMBEDDING_MAX_TPM', 1000000))
+)
+
+def _is_retryable(exception: BaseException) -> bool:
+    """
+    Retry SerpAPI calls on rate limits, server errors and connection problems.
+    """
+    if isinstance(exception, httpx.HTTPStatusError):
+        status = exception.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exception, httpx.TransportError)
+
+_wait_random_exponential = wait_random_exponential(min=1, max=60)
+
+def _wait_for_retry(retry_state: RetryCallState) -> float:
+    """
+    Honor SerpAPI's Retry-After header when present, otherwise back off exponentially with jitter.
+    """
+    exception = retry_state.outcome.exception()
+    if isinstance(exception, httpx.HTTPStatusError):
+        retry_after = exception.response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return float(retry_after) + random.uniform(0, 0.5)
+            except ValueError:
+                pass  # HTTP-date form, fall back to exponential backoff
+    return _wait_random_exponential(retry_state)
+
+class Profile(NamedTuple):
+    """
+    The columns of a connection needed to look up and tag their profile.
+    """
+    first_name: str
+    last_name: str
+    company: str
+    position: str
+    url: str
+
+    def person_info(self) -> Dict:
+        """
+        Return the person details used in prompts and cache keys.
+        """
+        return {
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'company': self.company,
+            'position': self.position
+        }
+
+PROFILE_COLUMNS = ['First Name', 'Last Name', 'Company', 'Position', 'URL']
+
+def _interests_cache_key(profile_text: str, person_info: Dict) -> str:
+    """
+    Build the cache key for the interests of a profile.
+    """
+    key_source = TAGGING_METHOD + profile_text + json.dumps(person_info, sort_keys=True, default=str)
+    return hashlib.sha256(key_source.encode()).hexdigest()
 
-def get_interests_from_profile(profile_text: str, person_info: Dict) -> List[str]:
+def interests_from_ids(ids: List) -> List[str]:
+    """
+    Map interest numbers returned by the model back to interest names, dropping invalid ones.
+    """
+    # JSON booleans are ints in Python, so check the exact type
+    return [INTERESTS[i] for i in ids if type(i) is int and 0 <= i < len(INTERESTS)][:10]
+
+def build_profile_request(profile_text: str, person_info: Dict) -> Dict:
+    """
+    Build the chat completion arguments for tagging a single profile.
+    """
+    return {
+        "model": CHAT_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": PROFILE_PROMPT_TEMPLATE.format(text=profile_text, **person_info)}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 100,
+        "response_format": {"type": "json_object"}
+    }
+
+def parse_interests(interests_text: str) -> List[str]:
+    """
+    Parse the model's reply for a single profile into at most 10 interests.
+    Returns ["Profile inaccessible"] if no interest can be recovered from it.
+    """
+    try:
+        interests_data = json.loads(interests_text)
+    except json.JSONDecodeError:
+        interests_data = None
+    
+    # Expect {"ids": [...]}, but also accept a bare list of ids
+    ids = interests_data.get("ids") if isinstance(interests_data, dict) else interests_data
+    interests = interests_from_ids(ids) if isinstance(ids, list) else []
+    
+    if not interests:
+        # Any other reply: pick out the interest names mentioned in the text
+        found = {match for _, match in INTERESTS_AUTOMATON.iter(interests_text.lower())}
+        interests = [interest for _, interest in sorted(found)]
+    
+    return interests[:10] or ["Profile inaccessible"]
+
+async def get_interests_from_profile(profile_text: str, person_info: Dict) -> List[str]:
     """
     Use OpenAI's API to analyze the profile and return relevant interests.
     """
     try:
-        # Truncate profile text to reduce token count
-        max_tokens = 2000
-        truncated_text = profile_text[:max_tokens]
-        
-        prompt = f"""
-        Based on the following LinkedIn profile information, select at least 5 most relevant interests from the provided list.
-        Only select from these interests: {', '.join(INTERESTS)}
-        
-        Person's information:
-        Name: {person_info['first_name']} {person_info['last_name']}
-        Company: {person_info['company']}
-        Position: {person_info['position']}
+        # Return cached interests for an identical profile
+        cache_key = _interests_cache_key(profile_text, person_info)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        Profile content:
-        {truncated_text}
-        
-        Return the interests as a JSON array of strings, selecting the most relevant interests based on the profile information.
-        Example response format: ["Leadership", "Management", "Strategy", "Innovation", "Career Development"]
-        """
-
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "You are a professional career analyst. Your task is to analyze LinkedIn profiles and identify relevant professional interests and expertise areas. Always return a valid JSON array of strings."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=500,
-            response_format={ "type": "json_object" }
-        )
+        request = build_profile_request(profile_text, person_info)
+        prompt_chars = sum(len(message["content"]) for message in request["messages"])
+        await openai_limiter.acquire(estimated_tokens=prompt_chars // 4 + request["max_tokens"])
+        response = await client.chat.completions.create(**request)
 
         # Extract and parse the interests from the response
-        interests_text = response.choices[0].message.content
-        try:
-            # Try to parse as JSON object first
-            interests_data = json.loads(interests_text)
-            if isinstance(interests_data, dict) and "interests" in interests_data:
-                interests = interests_data["interests"]
-            else:
-                # If not a dict with "interests" key, try parsing as array directly
-                interests = json.loads(interests_text)
-        except json.JSONDecodeError:
-            # If JSON parsing fails, try to extract interests from text
-            interests = []
-            for interest in INTERESTS:
-                if interest.lower() in interests_text.lower():
-                    interests.append(interest)
-            if not interests:
-                interests = ["Profile inaccessible"]
-
-        return interests[:10]  # Limit to 10 interests maximum
+        interests = parse_interests(response.choices[0].message.content)
+        if interests and interests != ["Profile inaccessible"]:
+            cache.set(cache_key, interests, expire=CACHE_EXPIRE)
+        return interests
 
     except Exception as e:
-        logging.error(f"Error getting interests for {person_info['first_name']} {person_info['last_name']}: {str(e)}")
+        logging.error("Error getting interests for %s %s: %s", person_info['first_name'], person_info['last_name'], e)
         return ["Profile inaccessible"]
 
-def get_linkedin_profile_data(url: str) -> str:
+async def get_interests_batch(profiles: List[Tuple[str, Dict]]) -> List[List[str]]:
+    """
+    Use a single OpenAI request to return relevant interests for several profiles.
+    Raises ValueError if the response doesn't contain one result per profile.
+    """
+    sections = ''.join(
+        BATCH_PROFILE_TEMPLATE.format(index=i, text=profile_text, **person_info)
+        for i, (profile_text, person_info) in enumerate(profiles, start=1)
+    )
+    prompt = BATCH_PROMPT_TEMPLATE.format(profiles=sections)
+    
+    max_tokens = 100 * len(profiles)
+    await openai_limiter.acquire(estimated_tokens=(len(SYSTEM_PROMPT) + len(prompt)) // 4 + max_tokens)
+    response = await client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.3,
+        max_tokens=max_tokens,
+        response_format={ "type": "json_object" }
+    )
+    
+    results = json.loads(response.choices[0].message.content).get("results")
+    if not isinstance(results, list) or len(results) != len(profiles):
+        raise ValueError(f"Expected {len(profiles)} results from batch request")
+    
+    by_index = {result.get("index"): result.get("ids") for result in results if isinstance(result, dict)}
+    batch_interests = []
+    for i, (profile_text, person_info) in enumerate(profiles, start=1):
+        ids = by_index.get(i)
+        interests = interests_from_ids(ids) if isinstance(ids, list) else []
+        if not interests:
+            raise ValueError(f"Missing interests for profile {i} in batch request")
+        cache.set(_interests_cache_key(profile_text, person_info), interests, expire=CACHE_EXPIRE)
+        batch_interests.append(interests)
+    
+    return batch_interests
+
+async def get_interests_embedding(profiles: List[Tuple[str, Dict]]) -> List[List[str]]:
+    """
+    Rank interests for several profiles by embedding similarity, using a single embeddings request.
+    """
+    inputs = [
+        f"{person_info['position']} at {person_info['company']}\n{profile_text}"
+        for profile_text, person_info in profiles
+    ]
+    
+    labels = await get_label_embeddings(client, embedding_limiter)
+    await embedding_limiter.acquire(estimated_tokens=sum(len(text) for text in inputs) // 4)
+    response = await client.embeddings.create(model=EMBEDDING_MODEL, input=inputs)
+    
+    batch_interests = []
+    for (profile_text, person_info), item in zip(profiles, response.data):
+        interests = rank_interests(labels, np.array(item.embedding, dtype=np.float32))
+        cache.set(_interests_cache_key(profile_text, person_info), interests, expire=CACHE_EXPIRE)
+        batch_interests.append(interests)
+    
+    return batch_interests
+
+def _shingles(sentence: str, n: int = 5) -> np.ndarray:
+    """
+    Return the sorted, unique hashes of the lowercase character n-grams in a sentence.
+    """
+    text = ' '.join(sentence.lower().split())
+    grams = [text] if len(text) <= n else [text[i:i + n] for i in range(len(text) - n + 1)]
+    return np.unique(np.fromiter((hash(gram) for gram in grams), dtype=np.int64, count=len(grams)))
+
+@njit(cache=True)
+def _max_jaccard(shingles: np.ndarray, kept: np.ndarray, offsets: np.ndarray) -> float:
+    """
+    Return the highest Jaccard similarity between shingles and any kept sentence.
+    Kept sentences are stored back to back in kept, sentence k spanning offsets[k]:offsets[k + 1].
+    """
+    best = 0.0
+    for k in range(len(offsets) - 1):
+        other = kept[offsets[k]:offsets[k + 1]]
+        # Both arrays are sorted, so count the intersection with a merge
+        i = j = common = 0
+        while i < len(shingles) and j < len(other):
+            if shingles[i] == other[j]:
+                common += 1
+                i += 1
+                j += 1
+            elif shingles[i] < other[j]:
+                i += 1
+            else:
+                j += 1
+        union = len(shingles) + len(other) - common
+        if union > 0 and common / union > best:
+            best = common / union
+    return best
+
+def select_sentences(chunks: List[str], max_chars: int = MAX_PROFILE_CHARS) -> str:
+    """
+    Join the sentences of the search result text, skipping near-duplicates, up to max_chars.
+    """
+    kept = []
+    kept_shingles = np.empty(0, dtype=np.int64)
+    offsets = [0]
+    length = 0
+    for chunk in chunks:
+        for sentence in _SENTENCE_RE.split(chunk):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            
+            shingles = _shingles(sentence)
+            if _max_jaccard(shingles, kept_shingles, np.array(offsets, dtype=np.int64)) >= DUPLICATE_THRESHOLD:
+                continue
+            
+            if length + len(sentence) > max_chars:
+                if not kept:
+                    kept.append(sentence[:max_chars])
+                return ' '.join(kept)
+            
+            kept.append(sentence)
+            kept_shingles = np.concatenate((kept_shingles, shingles))
+            offsets.append(len(kept_shingles))
+            length += len(sentence) + 1  # Joining space
+    
+    return ' '.join(kept)
+
+async def get_linkedin_profile_data(http_client: httpx.AsyncClient, url: str) -> str:
     """
     Get LinkedIn profile data using SerpAPI's Google Search API.
     """
     try:
+        if not url:
+            logging.warning("Connection has no profile URL")
+            return ""
+        
+        # Return cached search results for this profile
+        cache_key = hashlib.sha256(url.encode()).hexdigest()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Extract the profile ID from the URL
-        profile_id = url.split('/in/')[-1].split('/')[0]
+        match = _PROFILE_RE.search(url)
+        if not match:
+            logging.warning("Not a LinkedIn profile URL: %s", url)
+            return ""
+        profile_id = match.group(1)
         
         # SerpAPI endpoint for Google Search
         api_url = "https://serpapi.com/search"
@@ -110,87 +398,306 @@ def get_linkedin_profile_data(url: str) -> str:
             "filter": 0  # Don't filter similar results
         }
         
-        response = requests.get(api_url, params=params)
-        
-        # Check for rate limiting
-        if response.status_code == 429:
-            logging.warning("Rate limit reached. Waiting before retry...")
-            time.sleep(60)  # Wait for 1 minute
-            return get_linkedin_profile_data(url)  # Retry
-        
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Extract relevant profile information
-        profile_info = []
+        async for attempt in AsyncRetrying(
+            wait=_wait_for_retry,
+            stop=stop_after_attempt(5),
+            retry=retry_if_exception(_is_retryable),
+            reraise=True
+        ):
+            with attempt:
+                await serpapi_limiter.acquire()
+                response = await http_client.get(api_url, params=params)
+                
+                # Check for rate limiting
+                if response.status_code == 429:
+                    logging.warning("Rate limit reached (attempt %d). Retrying with backoff...", attempt.retry_state.attempt_number)
+                
+                response.raise_for_status()
+                
+                data = orjson.loads(response.content)
         
-        if 'organic_results' in data:
-            for result in data['organic_results']:
-                if 'title' in result:
-                    profile_info.append(result['title'])
-                if 'snippet' in result:
-                    profile_info.append(result['snippet'])
-                if 'link' in result and profile_id in result['link']:
-                    # This is likely the main profile result
-                    if 'about_this_result' in result:
-                        profile_info.append(result['about_this_result'].get('description', ''))
+        # Extract relevant profile information; the description is only
+        # taken from the result linking to the profile itself
+        profile_info = list(chain.from_iterable(
+            (
+                result.get('title', ''),
+                result.get('snippet', ''),
+                result.get('about_this_result', {}).get('description', '') if profile_id in result.get('link', '') else ''
+            )
+            for result in data.get('organic_results', ())
+        ))
         
-        # If we found any information, return it
-        if profile_info:
-            return ' '.join(profile_info).strip()
+        # If we found any information, return its distinct sentences
+        result = select_sentences(profile_info)
+        if result:
+            cache.set(cache_key, result, expire=CACHE_EXPIRE)
+            return result
         
         logging.warning("No profile information found in search results")
         return ""
     
+    except httpx.HTTPStatusError as e:
+        # The exception message contains the request URL, which carries the API key
+        logging.error("Error getting profile data from SerpAPI for %s: HTTP %d", profile_id, e.response.status_code)
+        return ""
+    
     except Exception as e:
-        logging.error(f"Error getting profile data from SerpAPI: {str(e)}")
+        logging.error("Error getting profile data from SerpAPI: %s", e)
         return ""
 
-def process_profiles(df: pd.DataFrame, output_file: str) -> None:
+def _serpapi_client() -> httpx.AsyncClient:
     """
-    Process profiles using SerpAPI method.
+    Create a pooled HTTP/2 client so SerpAPI requests reuse one TLS connection.
     """
-    try:
-        # Add new column for interests if it doesn't exist
-        if 'Interests' not in df.columns:
-            df['Interests'] = ''
+    limits = httpx.Limits(max_connections=50, max_keepalive_connections=50)
+    return httpx.AsyncClient(http2=True, timeout=30.0, limits=limits)
+
+def read_rows(df: pd.DataFrame) -> Tuple[List[Profile], List[List]]:
+    """
+    Extract the profiles and the output records of a chunk, with missing values as ''.
+    """
+    # Extract plain tuples up front rather than building a Series per row
+    records = [
+        ['' if pd.isna(value) else value for value in values]
+        for values in df.itertuples(index=False, name=None)
+    ]
+    profile_columns = [df.columns.get_loc(column) for column in PROFILE_COLUMNS]
+    profiles = [Profile._make(record[i] for i in profile_columns) for record in records]
+    return profiles, records
+
+async def lookup_profiles(
+    http_client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    profiles: List[Profile]
+) -> Tuple[List[str], List[Tuple[int, str, Dict]]]:
+    """
+    Fetch the profiles' text with SerpAPI and reuse any interests already cached for it.
+    Returns the joined interests for each profile ("Profile inaccessible" if nothing could be
+    fetched, '' if it still needs tagging) and the (position, profile text, person info) of
+    each profile that still needs tagging.
+    """
+    async def fetch(profile: Profile) -> str:
+        async with semaphore:
+            logging.info("Processing profile for %s %s", profile.first_name, profile.last_name)
+            return await get_linkedin_profile_data(http_client, profile.url)
+    
+    # Get profile data using SerpAPI
+    profile_texts = await asyncio.gather(*(fetch(profile) for profile in profiles))
+    
+    results = [''] * len(profiles)
+    pending = []
+    for i, (profile, profile_text) in enumerate(zip(profiles, profile_texts)):
+        if not profile_text:
+            logging.warning("Could not fetch profile content for %s %s", profile.first_name, profile.last_name)
+            results[i] = "Profile inaccessible"
+            continue
         
-        logging.info(f"Processing {len(df)} profiles")
+        person_info = profile.person_info()
         
-        # Process each profile
-        for index, row in df.iterrows():
-            name = f"{row['First Name']} {row['Last Name']}"
-            logging.info(f"Processing profile for {name}")
+        # Skip the API for profiles that were already tagged
+        cached = cache.get(_interests_cache_key(profile_text, person_info))
+        if cached is not None:
+            results[i] = ', '.join(cached)
+        else:
+            pending.append((i, profile_text, person_info))
+    
+    return results, pending
+
+async def process_batch(http_client: httpx.AsyncClient, semaphore: asyncio.Semaphore, profiles: List[Profile]) -> List[str]:
+    """
+    Fetch and tag a batch of profiles, returning the joined interests for each profile.
+    """
+    results, pending = await lookup_profiles(http_client, semaphore, profiles)
+    if not pending:
+        return results
+    
+    # Get interests using OpenAI, one request for the whole batch
+    batch = [(text, info) for _, text, info in pending]
+    if TAGGING_METHOD == 'embedding':
+        async with semaphore:
+            batch_interests = await get_interests_embedding(batch)
+    else:
+        try:
+            async with semaphore:
+                batch_interests = await get_interests_batch(batch)
+        except Exception as e:
+            logging.warning("Batch request failed, falling back to per-profile requests: %s", e)
             
-            # Get profile data using SerpAPI
-            profile_text = get_linkedin_profile_data(row['URL'])
+            async def tag(profile_text: str, person_info: Dict) -> List[str]:
+                async with semaphore:
+                    return await get_interests_from_profile(profile_text, person_info)
             
-            if profile_text:
-                # Get interests using OpenAI
-                person_info = {
-                    'first_name': row['First Name'],
-                    'last_name': row['Last Name'],
-                    'company': row['Company'],
-                    'position': row['Position']
-                }
-                
-                interests = get_interests_from_profile(profile_text, person_info)
-                
-                # Update DataFrame
-                df.at[index, 'Interests'] = ', '.join(interests)
-                
-                # Save progress after each profile
-                df.to_csv(output_file, index=False)
-                
-                # Add delay to respect rate limits
-                time.sleep(2)
-            else:
-                logging.warning(f"Could not fetch profile content for {name}")
-                df.at[index, 'Interests'] = "Profile inaccessible"
+            batch_interests = await asyncio.gather(*(tag(text, info) for text, info in batch))
+    
+    for (i, _, _), interests in zip(pending, batch_interests):
+        results[i] = ', '.join(interests)
+    return results
+
+async def process_chunk(http_client: httpx.AsyncClient, semaphore: asyncio.Semaphore, df: pd.DataFrame, writer, f) -> None:
+    """
+    Process one chunk of profiles concurrently, appending each batch to the output as it completes.
+    """
+    profiles, records = read_rows(df)
+    interests_column = df.columns.get_loc('Interests')
+    interests_out = ["Profile inaccessible"] * len(df)
+    
+    async def run_batch(start: int) -> None:
+        end = start + BATCH_SIZE
+        try:
+            interests_out[start:end] = await process_batch(http_client, semaphore, profiles[start:end])
+        except Exception as e:
+            logging.error("Error processing batch of %d profiles: %s", len(profiles[start:end]), e)
+        
+        # Save progress after each batch
+        for record, joined in zip(records[start:end], interests_out[start:end]):
+            record[interests_column] = joined
+            writer.writerow(record)
+        f.flush()
+    
+    # Dispatch every batch at once; the semaphore bounds in-flight requests
+    await asyncio.gather(*(run_batch(start) for start in range(0, len(df), BATCH_SIZE)))
+
+async def process_profiles(chunks: Iterable[pd.DataFrame], output_file: str) -> None:
+    """
+    Process profiles chunk by chunk using SerpAPI method, streaming results to output_file.
+    """
+    try:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+        processed = 0
+        
+        with open(output_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            
+            async with _serpapi_client() as http_client:
+                for i, df in enumerate(chunks):
+                    # Add new column for interests if it doesn't exist
+                    if 'Interests' not in df.columns:
+                        df['Interests'] = ''
+                    
+                    # Write the header once; rows are appended as their batch completes
+                    if i == 0:
+                        writer.writerow(df.columns)
+                    
+                    logging.info("Processing %d profiles", len(df))
+                    await process_chunk(http_client, semaphore, df, writer, f)
+                    processed += len(df)
+                    logging.info("Processed %d profiles so far", processed)
         
         logging.info("SerpAPI processing completed successfully")
         
     except Exception as e:
-        logging.error(f"Error processing profiles with SerpAPI: {str(e)}")
-        raise 
\ No newline at end of file
+        logging.error("Error processing profiles with SerpAPI: %s", e)
+        raise
+
+async def run_openai_batch(bodies: Dict[str, Dict], batch_file: str, poll_interval: float) -> Dict[str, str]:
+    """
+    Submit chat completion requests through OpenAI's Batch API, wait for the job to finish
+    and return the reply text for each custom_id that succeeded.
+    """
+    with open(batch_file, 'wb') as f:
+        for custom_id, body in bodies.items():
+            f.write(orjson.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}))
+            f.write(b"\n")
+    
+    with open(batch_file, 'rb') as f:
+        batch_input = await client.files.create(file=f, purpose='batch')
+    batch = await client.batches.create(
+        input_file_id=batch_input.id,
+        endpoint='/v1/chat/completions',
+        completion_window='24h'
+    )
+    logging.info("Submitted batch %s with %d requests", batch.id, len(bodies))
+    
+    while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+        await asyncio.sleep(poll_interval)
+        batch = await client.batches.retrieve(batch.id)
+        logging.info("Batch %s status: %s", batch.id, batch.status)
+    
+    if not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch.id} ended with status {batch.status} and no results")
+    if batch.status != 'completed':
+        logging.warning("Batch %s ended with status %s; using partial results", batch.id, batch.status)
+    
+    output = await client.files.content(batch.output_file_id)
+    replies = {}
+    for line in output.text.splitlines():
+        if not line:
+            continue
+        result = orjson.loads(line)
+        response = result.get('response') or {}
+        if response.get('status_code') != 200:
+            logging.warning("Batch request %s failed: %s", result.get('custom_id'), result.get('error'))
+            continue
+        replies[result['custom_id']] = response['body']['choices'][0]['message']['content']
+    return replies
+
+async def process_profiles_batch_api(
+    chunks: Iterable[pd.DataFrame],
+    output_file: str,
+    batch_file: str = 'batch.jsonl',
+    poll_interval: float = 60
+) -> None:
+    """
+    Process profiles using SerpAPI method, tagging them through OpenAI's Batch API.
+    Costs half as much and avoids live rate limits, but results can take up to 24 hours.
+    """
+    columns = None
+    records = []
+    interests_out = []
+    try:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+        pending = {}  # custom_id -> (row position, profile text, person info)
+        
+        async with _serpapi_client() as http_client:
+            for df in chunks:
+                # Add new column for interests if it doesn't exist
+                if 'Interests' not in df.columns:
+                    df['Interests'] = ''
+                if columns is None:
+                    columns = list(df.columns)
+                
+                profiles, chunk_records = read_rows(df)
+                chunk_interests, chunk_pending = await lookup_profiles(http_client, semaphore, profiles)
+                for i, profile_text, person_info in chunk_pending:
+                    position = len(records) + i
+                    pending[f"row-{position}"] = (position, profile_text, person_info)
+                records.extend(chunk_records)
+                interests_out.extend(chunk_interests)
+        
+        if pending:
+            bodies = {custom_id: build_profile_request(text, info) for custom_id, (_, text, info) in pending.items()}
+            replies = await run_openai_batch(bodies, batch_file, poll_interval)
+            
+            # Profiles without a reply keep an empty Interests cell, marking them as not tagged
+            for custom_id, (position, profile_text, person_info) in pending.items():
+                if custom_id not in replies:
+                    continue
+                # A bad reply only loses its own profile
+                try:
+                    interests = parse_interests(replies[custom_id])
+                    joined = ', '.join(interests)
+                except Exception as e:
+                    logging.error("Error parsing interests for %s %s: %s", person_info['first_name'], person_info['last_name'], e)
+                    interests_out[position] = "Profile inaccessible"
+                    continue
+                if interests and interests != ["Profile inaccessible"]:
+                    cache.set(_interests_cache_key(profile_text, person_info), interests, expire=CACHE_EXPIRE)
+                interests_out[position] = joined
+        
+    except Exception as e:
+        logging.error("Error processing profiles with the Batch API: %s", e)
+        raise
+    
+    finally:
+        # Save results, including the profiles fetched before any failure. Nothing is
+        # written if no rows were read, so an earlier output file isn't clobbered
+        if columns is not None:
+            with open(output_file, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                interests_column = columns.index('Interests')
+                for record, joined in zip(records, interests_out):
+                    record[interests_column] = joined
+                    writer.writerow(record)
+    
+    logging.info("SerpAPI batch processing completed successfully")